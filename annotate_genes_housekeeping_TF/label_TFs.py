@@ -4,24 +4,27 @@
 Lambert SA, Jolma A, Campitelli LF, Das PK, Yin Y, Albu M, Chen X, Taipale J, Hughes TR, Weirauch MT. The Human Transcription Factors. Cell. 2018 Feb 8;172(4):650-665. doi: 10.1016/j.cell.2018.01.029. Erratum in: Cell. 2018 Oct 4;175(2):598-599. doi: 10.1016/j.cell.2018.09.045. PMID: 29425488.
 """
 
+import numpy as np
 import pandas as pd
 import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
 
 print("reading Lambert Cell 2018 TF Ensembl IDs . . .")
 
-LAMBERT_tfs = pd.read_table("LAMBERT_CELL_2018_hg38_TFs.tsv")
+LAMBERT_tfs = pd.read_table("LAMBERT_CELL_2018_hg38_TFs.tsv", engine="pyarrow")
 
 print("reading CRE-gene pairs . . .")
 
-pair_info = pd.read_table(sys.argv[1])
+pair_info = e2g_io.load_universe(sys.argv[1])
 
-tf_ensembl = [x.split(".")[0] for x in LAMBERT_tfs["gene_id"].to_numpy()]
+tf_ensembl = LAMBERT_tfs["gene_id"].str.partition(".")[0].to_numpy()
 
 print("labeling TFs . . .")
 
-pair_info["is_tf"] = 0
+pair_info["is_tf"] = pair_info["GeneEnsemblID"].isin(tf_ensembl).astype(np.int8)
 
-pair_info.loc[pair_info["GeneEnsemblID"].isin(tf_ensembl), "is_tf"] = 1
-
-print("writing output file to " + sys.argv[1].split(".")[0] + "_tf_genes_marked.tsv.gz . . .")
-pair_info.to_csv(sys.argv[1].split(".")[0] + "_tf_genes_marked.tsv.gz", sep="\t", index=False)
\ No newline at end of file
+output_path = e2g_io.derived_path(sys.argv[1], "_tf_genes_marked")
+print("writing output file to " + output_path + " . . .")
+e2g_io.save_universe(pair_info, output_path)
\ No newline at end of file
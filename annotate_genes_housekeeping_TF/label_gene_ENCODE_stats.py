@@ -1,48 +1,43 @@
 # ANDREW ROJNUCKARIN 10.23.25 AROJNUC1@JH.EDU AROJNUCK@GMAIL.COM
 
+import numpy as np
 import pandas as pd
 import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
 
 print("reading ENCODE RNA-seq data from tables . . .")
-ENCODE_rna = pd.read_table("ENCODE_RNA.tsv.gz")
-ENCODE_info = pd.read_table("ENCODE_RNA_info.tsv")
+ENCODE_rna = pd.read_table("ENCODE_RNA.tsv.gz", engine="pyarrow")
+ENCODE_info = pd.read_table("ENCODE_RNA_info.tsv", engine="pyarrow")
 
-pair_info = pd.read_table(sys.argv[1])
+pair_info = e2g_io.load_universe(sys.argv[1])
 
 print("coalesce ENCODE RNA-seq data by biosample name . . .")
-sample_dict = {x: [] for x in ENCODE_info["Biosample.term.name"].unique()}
-for i in ENCODE_info.index:
-    sample_dict[ENCODE_info.loc[i, "Biosample.term.name"]].append(ENCODE_info.loc[i, "tsv"])
+tsv_to_sample = ENCODE_info.set_index("tsv")["Biosample.term.name"]
 
-ENCODE_rna_collapsed = ENCODE_rna.loc[:, ["gene_id"]].copy()
+ENCODE_rna_collapsed = ENCODE_rna.set_index("gene_id").loc[:, tsv_to_sample.index].T.groupby(tsv_to_sample, sort=False).mean().T.reset_index()
 
-for i, sample in enumerate(list(sample_dict.keys())):
-    ENCODE_rna_collapsed[sample] = ENCODE_rna.loc[:, sample_dict[sample]].mean(axis=1)
-    if i % 50 == 0:
-        ENCODE_rna_collapsed = ENCODE_rna_collapsed.copy()
-
-ENCODE_rna_collapsed.iloc[:, 1:] = ENCODE_rna_collapsed.iloc[:, 1:] / ENCODE_rna_collapsed.iloc[:, 1:].mean(axis=0)
+# mean normalize each biosample on a single float32 gene x biosample array
+tpm = ENCODE_rna_collapsed.iloc[:, 1:].to_numpy(dtype=np.float32)
+tpm /= tpm.mean(axis=0, keepdims=True)
 
 print("calculate ENCODE RNA-seq data statistics . . .")
-ENCODE_rna_collapsed["std"] = ENCODE_rna_collapsed.iloc[:, 1:].std(axis=1)
-ENCODE_rna_collapsed["mean"] = ENCODE_rna_collapsed.iloc[:, 1:].mean(axis=1)
+ENCODE_rna_collapsed = ENCODE_rna_collapsed[["gene_id"]].assign(std=tpm.std(axis=1, ddof=1), mean=tpm.mean(axis=1))
 ENCODE_rna_collapsed["disp"] = ENCODE_rna_collapsed["std"] / (ENCODE_rna_collapsed["mean"] + 1)
 
-ENCODE_rna_collapsed["gene_id"] = [x.split(".")[0] for x in ENCODE_rna_collapsed["gene_id"]]
-
-drop_id = []
-for i, group in ENCODE_rna_collapsed.groupby("gene_id"):
-    if len(group.index) > 1:
-        drop_id.append(i)
+ENCODE_rna_collapsed["gene_id"] = ENCODE_rna_collapsed["gene_id"].str.partition(".")[0]
 
-ENCODE_rna_collapsed = ENCODE_rna_collapsed.loc[~ENCODE_rna_collapsed["gene_id"].isin(drop_id), :]
+ENCODE_rna_collapsed = ENCODE_rna_collapsed.loc[~ENCODE_rna_collapsed["gene_id"].duplicated(keep=False), :]
 ENCODE_rna_collapsed = ENCODE_rna_collapsed.set_index(ENCODE_rna_collapsed["gene_id"].to_numpy())
 
 pair_info["std"] = 1.0
 pair_info["mean"] = 1.0
 pair_info["disp"] = 0.5
 
-pair_info.loc[pair_info["GeneEnsemblID"].isin(ENCODE_rna_collapsed.index), ["std", "mean", "disp"]] = ENCODE_rna_collapsed.loc[pair_info.loc[pair_info["GeneEnsemblID"].isin(ENCODE_rna_collapsed.index), "GeneEnsemblID"].to_numpy(), ["std", "mean", "disp"]].to_numpy()
+have_stats = pair_info["GeneEnsemblID"].isin(ENCODE_rna_collapsed.index)
+pair_info.loc[have_stats, ["std", "mean", "disp"]] = ENCODE_rna_collapsed[["std", "mean", "disp"]].reindex(pair_info.loc[have_stats, "GeneEnsemblID"].to_numpy()).to_numpy()
 
-print("writing output file to " + sys.argv[1].split(".")[0] + "_gene_ENCODE_stats.tsv.gz . . .")
-pair_info.to_csv(sys.argv[1].split(".")[0] + "_gene_ENCODE_stats.tsv.gz", sep="\t", index=False)
\ No newline at end of file
+output_path = e2g_io.derived_path(sys.argv[1], "_gene_ENCODE_stats")
+print("writing output file to " + output_path + " . . .")
+e2g_io.save_universe(pair_info, output_path)
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Interval statistics over bigWig tracks, shared by the phastCons and phyloP feature scripts. Scripts put the repository root on sys.path
+and import this module next to e2g_io.
+"""
+
+import numpy as np
+
+# longest span (bp) of base-level values read from the bigWig in one go (float32, so 40 MB at most)
+WINDOW_SIZE = 10_000_000
+# sorted intervals further apart than this (bp) are read separately, so the bases between sparse elements are skipped
+MAX_GAP = 2_000
+
+
+def bigwig_interval_stats(bw, chrom, starts, ends, stats = ("mean", "min", "max"), window_size = WINDOW_SIZE, max_gap = MAX_GAP):
+    """
+    Get bigWig statistics across each (start, end) interval on a chromosome: "mean" is the mean over covered bases,
+    "min" and "max" the extreme values. Returns one array per name in `stats`, in that order; only the requested
+    statistics are computed. Intervals with no covered bases get NaN.
+    """
+    n = len(starts)
+    results = {stat: np.full(n, np.nan) for stat in stats}
+    if n == 0 or chrom not in bw.chroms():
+        return tuple(results[stat] for stat in stats)
+
+    # group the sorted intervals into runs of nearby intervals within one window, and read each run's bases as one array
+    chrom_length = bw.chroms(chrom)
+    order = np.argsort(starts, kind = 'stable')
+    sorted_starts = starts[order]
+    reach = np.maximum.accumulate(np.minimum(ends[order], chrom_length))
+    new_run = (sorted_starts[1:] - reach[:-1] > max_gap) | (np.diff(sorted_starts // window_size) != 0)
+    for idx in np.split(order, np.flatnonzero(new_run) + 1):
+        s, e = starts[idx], np.minimum(ends[idx], chrom_length)
+        inside = s < e
+        idx, s, e = idx[inside], s[inside], e[inside]
+        if len(idx) == 0:
+            continue
+        run_start = int(s.min())
+        values = bw.values(chrom, run_start, int(e.max()), numpy = True)  # NaN where no base is covered
+        s, e = s - run_start, e - run_start
+
+        if "mean" in results:
+            covered = ~np.isnan(values)
+            cum_bases = np.concatenate(([0], np.cumsum(covered)))
+            cum_values = np.concatenate(([0.0], np.cumsum(np.where(covered, values, 0), dtype = np.float64)))
+            n_bases = cum_bases[e] - cum_bases[s]
+            results["mean"][idx] = np.divide(cum_values[e] - cum_values[s], n_bases,
+                                             out = np.full(len(idx), np.nan), where = n_bases > 0)
+
+        if "min" in results or "max" in results:
+            # reduceat over interleaved [s, e) bounds; the odd slots are discarded, and fmin/fmax skip uncovered bases
+            padded = np.append(values, np.nan)
+            run_bounds = np.column_stack((s, e)).ravel()
+            if "min" in results:
+                results["min"][idx] = np.fmin.reduceat(padded, run_bounds)[::2]
+            if "max" in results:
+                results["max"][idx] = np.fmax.reduceat(padded, run_bounds)[::2]
+
+    return tuple(results[stat] for stat in stats)
@@ -1,6 +1,10 @@
+import numpy as np
 import pandas as pd
 import argparse
-import gzip
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
 
 # Define your check_overlap function
 def check_overlap(ctcf_row, elem_start, elem_end):
@@ -8,8 +12,8 @@ def check_overlap(ctcf_row, elem_start, elem_end):
 
 def main(candidate_file, ctcf_file, output_file):
     # Read input files
-    candidate_df = pd.read_csv(candidate_file, sep='\t')
-    ctcf_df = pd.read_csv(ctcf_file, sep='\t')
+    candidate_df = e2g_io.load_universe(candidate_file)
+    ctcf_df = pd.read_csv(ctcf_file, sep='\t', engine='pyarrow')
 
     # Initialize a list to hold results for each chromosome
     results = []
@@ -25,25 +29,18 @@ def main(candidate_file, ctcf_file, output_file):
         unique_candidates = candidate_df[candidate_df['ElementChr'] == chr][['ElementChr', 'ElementStart', 'ElementEnd', 'ElementName']].drop_duplicates()
 
         # Filter CTCF data for this chromosome
-        ctcf_chr_df = ctcf_df[ctcf_df['chr'] == chr].rename(columns={'chr': 'ElementChr', 'start': 'CTCFStart', 'end': 'CTCFEnd'})
-
-        # Check for overlaps with merged DataFrame
-        merged_df = pd.merge(unique_candidates, ctcf_chr_df, on='ElementChr', how='left')
-
-        # Check overlaps using vectorized operations. Store as 1 for True, 0 for False
-        merged_df['Score'] = (
-            (merged_df['ElementStart'] < merged_df['CTCFEnd']) &
-            (merged_df['ElementEnd'] > merged_df['CTCFStart'])
-        ).astype(int)  # Convert boolean to integer (1 for True, 0 for False)
-
-        # Aggregate results to determine if any CTCF overlap exists for each candidate
-        score_results = merged_df.groupby('ElementName')['Score'].sum()
-
-        # Format the results DataFrame
-        score_results_df = score_results.reset_index().rename(columns={'Score': 'Score'})
-
-        # Merge with original unique_candidates to maintain the overall structure
-        unique_candidates = unique_candidates.merge(score_results_df, on='ElementName', how='left')
+        ctcf_chr_df = ctcf_df[ctcf_df['chr'] == chr]
+
+        # Count overlapping peaks per candidate without materializing the candidate x peak product.
+        # A peak overlaps [ElementStart, ElementEnd) iff start < ElementEnd and end > ElementStart; every
+        # peak with end <= ElementStart also has start < ElementEnd, so the count is a difference of two
+        # binary searches over the independently sorted peak starts and ends.
+        peak_starts = np.sort(ctcf_chr_df['start'].to_numpy())
+        peak_ends = np.sort(ctcf_chr_df['end'].to_numpy())
+        unique_candidates['Score'] = (
+            np.searchsorted(peak_starts, unique_candidates['ElementEnd'].to_numpy(), side='left') -
+            np.searchsorted(peak_ends, unique_candidates['ElementStart'].to_numpy(), side='right')
+        )
 
         # Append results for this chromosome
         results.append(unique_candidates)
@@ -55,11 +52,10 @@ def main(candidate_file, ctcf_file, output_file):
     result_df = candidate_df.merge(final_result_df[['ElementName', 'Score']], on='ElementName', how='left')
 
     # Fill NaN values with 0
-    result_df['Score'] = result_df['Score'].fillna(0)
+    result_df['Score'] = result_df['Score'].fillna(0).astype(np.int8)
 
-    # Save the final result to a gzipped file
-    with gzip.open(output_file, 'wt') as gz_file:
-        result_df.to_csv(gz_file, sep='\t', index=False)
+    # Save the final result (gzipped TSV or parquet, by extension)
+    e2g_io.save_universe(result_df, output_file)
 
     unique_elements = result_df[['ElementName', 'Score']].drop_duplicates()
     ctcf_enh = unique_candidates[unique_candidates['Score'] == 1]
@@ -69,9 +65,9 @@ def main(candidate_file, ctcf_file, output_file):
 if __name__ == "__main__":
     # Set up command line argument parsing
     parser = argparse.ArgumentParser(description='Process candidate and CTCF files for overlaps.')
-    parser.add_argument('-c', '--candidate_file', type=str, required=True, help='Name of the input candidate file (TSV)')
+    parser.add_argument('-c', '--candidate_file', type=str, required=True, help='Name of the input candidate file (TSV or parquet)')
     parser.add_argument('-t', '--ctcf_file', type=str, required=True, help='Name of the input CTCF file (BED)')
-    parser.add_argument('-o', '--output_file', type=str, required=True, help='Name of the output gzipped file')
+    parser.add_argument('-o', '--output_file', type=str, required=True, help='Name of the output file (gzipped TSV or parquet)')
 
     args = parser.parse_args()
     
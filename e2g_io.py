@@ -0,0 +1,80 @@
+"""
+I/O helpers shared by the E2G feature scripts. The scripts live one directory below the repository root and are run directly, so each
+reaches the shared modules in the root (this one, bigwig_stats) by putting the root on sys.path first:
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+    import e2g_io
+
+Universes are read and written through load_universe/save_universe. Importing this module also makes every gzip read and write in the
+process use ISA-L when it is installed, so scripts import it before reading any files.
+
+E2G universes can be kept as tab-separated text (optionally gzipped) or as a parquet dataset partitioned by ElementChr. Parquet stores the
+chromosome, gene symbol and Ensembl ID columns dictionary-encoded, so stages reading it skip re-parsing millions of repeated strings.
+"""
+
+import gzip
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+try:
+    # ISA-L inflates/deflates 2-3x faster than zlib; pandas opens every .gz file through gzip.GzipFile,
+    # so swapping in the drop-in subclass speeds up all compressed reads and writes
+    from isal import igzip
+    gzip.GzipFile = igzip.IGzipFile
+except ImportError:
+    pass
+
+PARQUET_SUFFIX = ".parquet"
+# suffixes derived_path replaces, longest first
+UNIVERSE_SUFFIXES = (".tsv.gz", ".tsv", PARQUET_SUFFIX)
+# low-cardinality string columns, loaded as pd.Categorical
+CATEGORICAL_COLUMNS = ["ElementChr", "GeneSymbol", "GeneEnsemblID"]
+# element coordinates, loaded as int32; GeneTSS may be blank, so it keeps the type pandas infers
+INT32_COLUMNS = ["ElementStart", "ElementEnd"]
+
+
+def is_parquet(path):
+    return str(path).rstrip(os.sep).endswith(PARQUET_SUFFIX)
+
+
+def derived_path(path, tag):
+    """Output path for a stage that adds `tag` to the universe at `path`, keeping its storage format."""
+    stem = str(path).rstrip(os.sep)
+    for suffix in UNIVERSE_SUFFIXES:
+        if stem.endswith(suffix):
+            stem = stem[:-len(suffix)]
+            break
+    return stem + tag + (PARQUET_SUFFIX if is_parquet(path) else ".tsv.gz")
+
+
+def load_universe(path):
+    """
+    Read an E2G universe from a parquet dataset or a (gzipped) TSV.
+    ElementChr, GeneSymbol and GeneEnsemblID come back categorical and ElementStart/ElementEnd as int32.
+    """
+    if is_parquet(path):
+        universe = pd.read_parquet(path)
+        # the partition column is appended last on read; universes lead with ElementChr
+        universe = universe[["ElementChr"] + [col for col in universe.columns if col != "ElementChr"]]
+    else:
+        dtype = {col: "category" for col in CATEGORICAL_COLUMNS} | {col: np.int32 for col in INT32_COLUMNS}
+        universe = pd.read_csv(path, sep="\t", engine="pyarrow", dtype=dtype)
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in universe.columns and not isinstance(universe[col].dtype, pd.CategoricalDtype):
+            universe[col] = universe[col].astype("category")
+    return universe
+
+
+def save_universe(universe, path):
+    """Write an E2G universe as a parquet dataset partitioned by ElementChr, or as a TSV compressed according to the suffix of `path`."""
+    if is_parquet(path):
+        # start from an empty dataset so partitions from an earlier run don't linger
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        universe.to_parquet(path, partition_cols=["ElementChr"], index=False)
+    else:
+        universe.to_csv(path, sep="\t", index=False, compression={"method": "infer", "compresslevel": 1})
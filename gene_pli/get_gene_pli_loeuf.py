@@ -7,6 +7,10 @@ import numpy as np
 import pandas as pd
 
 import argparse
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
 
 # set up argparse to read in command line arguments
 parser = argparse.ArgumentParser(description="Input file and output file paths")
@@ -16,10 +20,7 @@ parser.add_argument("output_path", help="Output path for E2G universe file with
 args = parser.parse_args()
 
 # read in E2G pair universe
-e2g_universe = pd.read_csv(
-    args.e2g_universe,
-    sep = '\t'
-)
+e2g_universe = e2g_io.load_universe(args.e2g_universe)
 
 # read in gene constraint info from gnomAD
 gene_info = pd.read_table(
@@ -47,9 +48,5 @@ e2g_universe_merged['pLI'] = e2g_universe_merged['pLI'].fillna(mean_pli)
 e2g_universe_merged['LOEUF'] = e2g_universe_merged['LOEUF'].fillna(mean_loeuf)
 
 # write to output file
-e2g_universe_merged.to_csv(
-    args.output_path,
-    sep = '\t'
-    index = False
-)
+e2g_io.save_universe(e2g_universe_merged, args.output_path)
 
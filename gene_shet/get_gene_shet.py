@@ -2,6 +2,10 @@ import numpy as np
 import pandas as pd
 
 import argparse
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
 
 # set up argparse to read in command line arguments
 parser = argparse.ArgumentParser(description="Input file and output file paths")
@@ -11,19 +15,18 @@ parser.add_argument("output_path", help="Output path for E2G universe file with
 args = parser.parse_args()
 
 # read in E2G universe
-e2g_universe = pd.read_csv(
-    args.e2g_universe,
-    sep = '\t'
-)
-
-# read in GeneBayes supplementary table
-genebayes_results = pd.read_excel(
-    args.genebayes_table,
-    sheet_name = 'Supplementary Table 1'
-)
-
-# filter for gene ENSG and posterior mean (point estimate)
-genebayes_results = genebayes_results[['ensg', 'post_mean']]
+e2g_universe = e2g_io.load_universe(args.e2g_universe)
+
+# read in gene ENSG and posterior mean (point estimate) from the GeneBayes supplementary table,
+# parsing the Excel file only once and caching the two columns as parquet next to it
+genebayes_cache = args.genebayes_table + '.parquet'
+if not os.path.exists(genebayes_cache) or os.path.getmtime(genebayes_cache) < os.path.getmtime(args.genebayes_table):
+    pd.read_excel(
+        args.genebayes_table,
+        sheet_name = 'Supplementary Table 1',
+        usecols = ['ensg', 'post_mean']
+    ).to_parquet(genebayes_cache, index = False)
+genebayes_results = pd.read_parquet(genebayes_cache, columns = ['ensg', 'post_mean'])
 
 # rename columns before merge
 genebayes_results.columns = ['GeneEnsemblID', 'genebayes_shet']
@@ -41,11 +44,7 @@ mean_shet = genebayes_results['genebayes_shet'].mean()
 e2g_universe['genebayes_shet'] = e2g_universe['genebayes_shet'].fillna(mean_shet)
 
 # write to output file
-e2g_universe.to_csv(
-    args.output_path,
-    sep = '\t',
-    index = False
-)
+e2g_io.save_universe(e2g_universe, args.output_path)
 
 
 
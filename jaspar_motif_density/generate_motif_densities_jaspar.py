@@ -2,20 +2,58 @@
 
 import argparse
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import pyBigWig
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
 
-def get_motif_features(motif_bigbed: pyBigWig, chrom, start, end, TF_name='CTCF'):
-    hits = motif_bigbed.entries(chrom, start, end) or []
-    filtered_hits = [item for item in hits if int(item[2].split('\t')[1]) >= 500]
-    n_hits = len(filtered_hits)
-    motif_density = n_hits / (end - start)
+# width (bp) of the genomic windows read from the bigBed in one go
+WINDOW_SIZE = 1_000_000
 
-    uniq_motif_ids = list(set(item[2].split('\t')[0] for item in filtered_hits))
-    uniq_n_hits = len(uniq_motif_ids)
-    uniq_motif_density = uniq_n_hits / (end - start)
+def get_motif_features(motif_bigbed: pyBigWig, chrom, starts, ends, TF_name='CTCF', window_size=WINDOW_SIZE):
+    """Motif features for all elements on a chromosome, reading the bigBed once per window of sorted elements."""
+    n = len(starts)
+    n_hits, uniq_n_hits, ctcf_motif_hit = np.zeros(n, dtype=np.int32), np.zeros(n, dtype=np.int32), np.zeros(n, dtype=np.int8)
 
-    ctcf_motif_hit = int(any(TF_name in item[2].split('\t')[3] for item in filtered_hits))
+    order = np.argsort(starts, kind='stable')
+    bounds = np.flatnonzero(np.diff(starts[order] // window_size)) + 1
+    for idx in np.split(order, bounds):
+        s, e = starts[idx], ends[idx]
+        hits = motif_bigbed.entries(chrom, int(s.min()), int(e.max())) or []
+
+        # parse the hits once per window and keep those with score >= 500
+        fields = [item[2].split('\t') for item in hits]
+        keep = np.array([int(f[1]) >= 500 for f in fields], dtype=bool)
+        if not keep.any():
+            continue
+        hit_start = np.array([item[0] for item in hits])[keep]
+        hit_end = np.array([item[1] for item in hits])[keep]
+        motif_codes, motif_ids = pd.factorize(np.array([f[0] for f in fields], dtype=object)[keep])
+        has_tf = np.array([TF_name in f[3] for f in fields], dtype=bool)[keep]
+
+        # hits are sorted by start, so the hits overlapping an element lie in [lo, hi);
+        # hits starting more than the longest hit before the element cannot reach it
+        max_len = (hit_end - hit_start).max()
+        lo = np.searchsorted(hit_start, s - max_len, side='right')
+        hi = np.searchsorted(hit_start, e, side='left')
+
+        # expand to (element, hit) pairs and keep the actual overlaps
+        n_pairs = hi - lo
+        pair_elem = np.repeat(np.arange(len(idx)), n_pairs)
+        pair_hit = np.arange(n_pairs.sum()) - np.repeat(np.cumsum(n_pairs) - n_pairs - lo, n_pairs)
+        overlap = hit_end[pair_hit] > s[pair_elem]
+        pair_elem, pair_hit = pair_elem[overlap], pair_hit[overlap]
+
+        n_hits[idx] = np.bincount(pair_elem, minlength=len(idx))
+        uniq_pairs = np.unique(pair_elem * len(motif_ids) + motif_codes[pair_hit])
+        uniq_n_hits[idx] = np.bincount(uniq_pairs // len(motif_ids), minlength=len(idx))
+        ctcf_motif_hit[idx] = np.bincount(pair_elem[has_tf[pair_hit]], minlength=len(idx)) > 0
+
+    motif_density = (n_hits / (ends - starts)).astype(np.float32)
+    uniq_motif_density = (uniq_n_hits / (ends - starts)).astype(np.float32)
 
     return motif_density, n_hits, uniq_motif_density, uniq_n_hits, ctcf_motif_hit
 
@@ -28,7 +66,7 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     # Load E2G pair tables
-    pairs_df = pd.read_table(args.e2g_pairs, compression='gzip')
+    pairs_df = e2g_io.load_universe(args.e2g_pairs)
 
     # Get unique elements
     uniq_elements_df = pairs_df[['ElementChr', 'ElementStart', 'ElementEnd']].drop_duplicates()
@@ -38,11 +76,15 @@ if __name__ == "__main__":
 
     motif_features_list = ['MotifDensityJaspar2024', 'MotifCountsJaspar2024', 'UniqueMotifDensityJaspar2024', 'UniqueMotifCountsJaspar2024', 'CTCFMotifHitJaspar2024']
 
-    # Calculate motif densities
-    uniq_elements_df[motif_features_list] = pd.DataFrame(
-        uniq_elements_df.apply(
-            lambda row: get_motif_features(jaspar_bb, row['ElementChr'], row['ElementStart'], row['ElementEnd'], 'CTCF'), axis=1).to_list(),
-            index=uniq_elements_df.index)
+    # Calculate motif densities, one chromosome at a time
+    element_starts = uniq_elements_df['ElementStart'].to_numpy()
+    element_ends = uniq_elements_df['ElementEnd'].to_numpy()
+    motif_features_df = pd.concat([
+        pd.DataFrame(
+            dict(zip(motif_features_list, get_motif_features(jaspar_bb, chrom, element_starts[idx], element_ends[idx], 'CTCF'))),
+            index=uniq_elements_df.index[idx])
+        for chrom, idx in uniq_elements_df.groupby('ElementChr', observed=True).indices.items()])
+    uniq_elements_df = uniq_elements_df.join(motif_features_df)
     processed_pairs_df = pairs_df.merge(uniq_elements_df, on=['ElementChr', 'ElementStart', 'ElementEnd'], how='left')
 
-    processed_pairs_df.to_csv(args.output_file, sep='\t', index=False, compression='gzip')
\ No newline at end of file
+    e2g_io.save_universe(processed_pairs_df, args.output_file)
\ No newline at end of file
@@ -1,7 +1,12 @@
-import pyBigWig, pandas as pd
+import pyBigWig, numpy as np, pandas as pd
 from tqdm import tqdm
 
 import argparse
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
+from bigwig_stats import bigwig_interval_stats
 
 # set up argparse to read in command line arguments
 parser = argparse.ArgumentParser(description="Input file and output file paths")
@@ -11,19 +16,22 @@ parser.add_argument("output_path", help="Output path for E2G universe file with
 args = parser.parse_args()
 
 # read in E2G universe
-e2g_universe = pd.read_csv(
-    args.e2g_universe,
-    sep = '\t'
-)
+e2g_universe = e2g_io.load_universe(args.e2g_universe)
 
-# get unique enhancers
-enhancers = e2g_universe[['ElementChr', 'ElementStart', 'ElementEnd']].drop_duplicates()
+# key each pair by a hash of its enhancer coordinates and get unique enhancers
+element_key = pd.util.hash_pandas_object(e2g_universe[['ElementChr', 'ElementStart', 'ElementEnd']], index = False)
+enhancers = e2g_universe.loc[~element_key.duplicated(), ['ElementChr', 'ElementStart', 'ElementEnd']]
 
 # read in bigWig file containing the phastCons scores
 bw = pyBigWig.open(args.phastcons_file)
 
-# get mean phastCons score across each enhancer
-enhancers["mean_phastCons"] = [bw.stats(c, s, e, type="mean")[0]  for c,s,e in tqdm(enhancers[["ElementChr","ElementStart","ElementEnd"]].to_numpy())]
+# get mean phastCons score across each enhancer, one chromosome at a time
+mean_phastCons = np.full(len(enhancers), np.nan)
+element_starts = enhancers['ElementStart'].to_numpy()
+element_ends = enhancers['ElementEnd'].to_numpy()
+for chrom, idx in tqdm(enhancers.groupby('ElementChr', observed = True).indices.items()):
+    mean_phastCons[idx], = bigwig_interval_stats(bw, chrom, element_starts[idx], element_ends[idx], stats = ('mean',))
+enhancers["mean_phastCons"] = mean_phastCons.astype(np.float32)
 
 # close the bigWig connection
 bw.close()
@@ -34,16 +42,11 @@ mean_mean_phastCons = enhancers['mean_phastCons'].mean()
 # impute missing values with the mean
 enhancers['mean_phastCons'] = enhancers['mean_phastCons'].fillna(mean_mean_phastCons)
 
-# merge with E2G universe
-e2g_universe = e2g_universe.merge(
-    enhancers,
-    how = 'left'
+# map enhancer scores back onto the E2G universe
+e2g_universe['mean_phastCons'] = element_key.map(
+    pd.Series(enhancers['mean_phastCons'].to_numpy(), index = element_key[enhancers.index])
 )
 
 # write E2G universe with added features to output file
-e2g_universe.to_csv(
-    args.output_path,
-    sep = '\t',
-    index = False
-)
+e2g_io.save_universe(e2g_universe, args.output_path)
 
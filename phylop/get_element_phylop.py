@@ -1,7 +1,12 @@
-import pyBigWig, pandas as pd
+import pyBigWig, numpy as np, pandas as pd
 from tqdm import tqdm
 
 import argparse
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
+from bigwig_stats import bigwig_interval_stats
 
 # set up argparse to read in command line arguments
 parser = argparse.ArgumentParser(description="Input file and output file paths")
@@ -11,20 +16,24 @@ parser.add_argument("output_path", help="Output path for E2G universe file with
 args = parser.parse_args()
 
 # read in E2G universe
-e2g_universe = pd.read_csv(
-    args.e2g_universe,
-    sep = '\t'
-)
+e2g_universe = e2g_io.load_universe(args.e2g_universe)
 
-# get unique enhancers
-enhancers = e2g_universe[['ElementChr', 'ElementStart', 'ElementEnd']].drop_duplicates()
+# key each pair by a hash of its enhancer coordinates and get unique enhancers
+element_key = pd.util.hash_pandas_object(e2g_universe[['ElementChr', 'ElementStart', 'ElementEnd']], index = False)
+enhancers = e2g_universe.loc[~element_key.duplicated(), ['ElementChr', 'ElementStart', 'ElementEnd']]
 
 # read in bigWig file containing the Zoonomia phyloP scores
 bw = pyBigWig.open(args.phylop_file)
 
-# get minimum and maximum PhyloP across each unique enhancer
-enhancers["min_phyloP"] = [bw.stats(c, s, e, type="min")[0]  for c,s,e in tqdm(enhancers[["ElementChr","ElementStart","ElementEnd"]].to_numpy())]
-enhancers["max_phyloP"] = [bw.stats(c, s, e, type="max")[0]  for c,s,e in tqdm(enhancers[["ElementChr","ElementStart","ElementEnd"]].to_numpy())]
+# get minimum and maximum PhyloP across each unique enhancer, one chromosome at a time
+min_phyloP = np.full(len(enhancers), np.nan)
+max_phyloP = np.full(len(enhancers), np.nan)
+element_starts = enhancers['ElementStart'].to_numpy()
+element_ends = enhancers['ElementEnd'].to_numpy()
+for chrom, idx in tqdm(enhancers.groupby('ElementChr', observed = True).indices.items()):
+    min_phyloP[idx], max_phyloP[idx] = bigwig_interval_stats(bw, chrom, element_starts[idx], element_ends[idx], stats = ('min', 'max'))
+enhancers["min_phyloP"] = min_phyloP.astype(np.float32)
+enhancers["max_phyloP"] = max_phyloP.astype(np.float32)
 
 # close the bigWig connection
 bw.close()
@@ -37,16 +46,11 @@ mean_min_phyloP = enhancers['min_phyloP'].mean()
 enhancers['max_phyloP'] = enhancers['max_phyloP'].fillna(mean_max_phyloP)
 enhancers['min_phyloP'] = enhancers['min_phyloP'].fillna(mean_min_phyloP)
 
-# merge with E2G universe
-e2g_universe = e2g_universe.merge(
-    enhancers,
-    how = 'left'
-)
+# map enhancer scores back onto the E2G universe
+enhancer_key = element_key[enhancers.index]
+e2g_universe['min_phyloP'] = element_key.map(pd.Series(enhancers['min_phyloP'].to_numpy(), index = enhancer_key))
+e2g_universe['max_phyloP'] = element_key.map(pd.Series(enhancers['max_phyloP'].to_numpy(), index = enhancer_key))
 
 # write E2G universe with added features to output file
-e2g_universe.to_csv(
-    args.output_path,
-    sep = '\t',
-    index = False
-)
+e2g_io.save_universe(e2g_universe, args.output_path)
 
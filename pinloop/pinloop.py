@@ -9,78 +9,134 @@ Luo, R., Yan, J., Oh, J.W. et al. Dynamic network-guided CRISPRi screen identifi
 
 import numpy as np
 import pandas as pd
+from numba import njit
+from scipy import sparse
+from concurrent.futures import ProcessPoolExecutor
 import sys
 import os
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
 
-print("reading ChIA-PET data . . .")
-chiapet = pd.read_table("ChIA-PET_final_filtered.tsv.gz")
-print("reading CRE-gene pairs . . .\n")
-pair_info = pd.read_table(sys.argv[1])
-pair_info["Pinloop"] = 0.0
-
-chiapet["loop_length"] = chiapet["center2"] - chiapet["center1"]
+# use the sparse Pinloop matrix when the loops cover less than this fraction of the dense gene x element matrix
+SPARSE_FRACTION = 0.1
 
 
 def alloc_pinloop(df_rna, df_atac, df_chiapet, loc_keys=["GeneTSS", "center"]):
     df_atac["center"] = (df_atac["ElementStart"] + df_atac["ElementEnd"]) / 2
-    loops = df_chiapet.assign(**{"atac_start": 0, "atac_end": 0, "rnaseq_start": 0, "rnaseq_end": 0})
-        
+    center1 = df_chiapet["center1"].to_numpy()
+    center2 = df_chiapet["center2"].to_numpy()
+    atac_start = atac_end = rnaseq_start = rnaseq_end = np.zeros(len(df_chiapet.index), dtype=np.int64)
+
     if len(df_atac.index) != 0:
-        loops.loc[df_chiapet.index, "atac_start"] = np.searchsorted(
-            df_atac[loc_keys[1]], 
-            df_chiapet["center1"]
-        ) + df_atac.index[0]
-
-        loops.loc[df_chiapet.index, "atac_end"] = np.searchsorted(
-            df_atac[loc_keys[1]], 
-            df_chiapet["center2"]
-        ) + df_atac.index[0]
-    
+        atac_centers = df_atac[loc_keys[1]].to_numpy()
+        atac_start = np.searchsorted(atac_centers, center1) + df_atac.index[0]
+        atac_end = np.searchsorted(atac_centers, center2) + df_atac.index[0]
+
     if len(df_rna.index) != 0:
-        loops.loc[df_chiapet.index, "rnaseq_start"] = np.searchsorted(
-            df_rna[loc_keys[0]], 
-            df_chiapet["center1"]
-        ) + df_rna.index[0]
-
-        loops.loc[df_chiapet.index, "rnaseq_end"] = np.searchsorted(
-            df_rna[loc_keys[0]], 
-            df_chiapet["center2"]
-        ) + df_rna.index[0]
-    return loops
-
-
-def p_inloop_dense(prm_ids, enh_ids, df_chiapet):
-    prm_id_dict = dict(zip(np.append(prm_ids, np.max(prm_ids)+1), np.arange(len(prm_ids)+1)))
-    enh_id_dict = dict(zip(np.append(enh_ids, np.max(enh_ids)+1), np.arange(len(enh_ids)+1)))
-    
-    p_inloop = np.zeros(shape=(len(prm_ids), len(enh_ids)), dtype=float)
-    prm_inloop = np.zeros(shape=len(prm_ids), dtype=float)
-    for idx, loop in df_chiapet.iterrows():
-        prm_start = prm_id_dict.get(loop["rnaseq_start"])
-        prm_end = prm_id_dict.get(loop["rnaseq_end"])
-        enh_start = enh_id_dict.get(loop["atac_start"])
-        enh_end = enh_id_dict.get(loop["atac_end"])
-        
-        prm_inloop[prm_start:prm_end] += loop["count"]
-        p_inloop[prm_start:prm_end, enh_start:enh_end] += loop["count"]
-
-    return np.divide(p_inloop, prm_inloop[:, None], out=np.zeros_like(p_inloop), where=prm_inloop[:, None] != 0)
-
-
-for chrm in pair_info["ElementChr"].unique():
+        rnaseq_centers = df_rna[loc_keys[0]].to_numpy()
+        rnaseq_start = np.searchsorted(rnaseq_centers, center1) + df_rna.index[0]
+        rnaseq_end = np.searchsorted(rnaseq_centers, center2) + df_rna.index[0]
+    return atac_start, atac_end, rnaseq_start, rnaseq_end
+
+
+@njit(cache=True)
+def add_loop_counts(p_inloop, prm_inloop, prm_start, prm_end, enh_start, enh_end, count):
+    for i in range(len(count)):
+        for prm in range(prm_start[i], prm_end[i]):
+            prm_inloop[prm] += count[i]
+            for enh in range(enh_start[i], enh_end[i]):
+                p_inloop[prm, enh] += count[i]
+
+
+def p_inloop_dense(prm_ids, enh_ids, atac_start, atac_end, rnaseq_start, rnaseq_end, count):
+    # prm_ids and enh_ids are contiguous, so loop bounds map to matrix positions by an offset
+    prm_start = rnaseq_start - prm_ids[0]
+    prm_end = rnaseq_end - prm_ids[0]
+    enh_start = atac_start - enh_ids[0]
+    enh_end = atac_end - enh_ids[0]
+
+    p_inloop = np.zeros(shape=(len(prm_ids), len(enh_ids)), dtype=np.float32)
+    prm_inloop = np.zeros(shape=len(prm_ids), dtype=np.float32)
+    add_loop_counts(p_inloop, prm_inloop, prm_start, prm_end, enh_start, enh_end, count)
+
+    # accumulate in float32, then normalize in place (rows of promoters without loops are already all zero) and store
+    # the [0, 1] ratios as float16 to halve the matrix that is kept around for the lookup
+    np.divide(p_inloop, prm_inloop[:, None], out=p_inloop, where=prm_inloop[:, None] != 0)
+    return p_inloop.astype(np.float16)
+
+
+def p_inloop_sparse(prm_ids, enh_ids, atac_start, atac_end, rnaseq_start, rnaseq_end, count):
+    prm_start = rnaseq_start - prm_ids[0]
+    prm_end = np.maximum(rnaseq_end - prm_ids[0], prm_start)
+    enh_start = atac_start - enh_ids[0]
+    enh_end = np.maximum(atac_end - enh_ids[0], enh_start)
+
+    # expand every loop into the (promoter, element) cells it covers
+    prm_len = prm_end - prm_start
+    enh_len = enh_end - enh_start
+    n_cells = prm_len * enh_len
+    loop = np.repeat(np.arange(len(count)), n_cells)
+    offset = np.arange(n_cells.sum()) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+    rows = prm_start[loop] + offset // enh_len[loop]
+    cols = enh_start[loop] + offset % enh_len[loop]
+    p_inloop = sparse.coo_matrix(
+        (count[loop].astype(np.float32), (rows, cols)), shape=(len(prm_ids), len(enh_ids))
+    ).tocsr()  # duplicate cells are summed
+
+    # loop counts per promoter via a difference array over the promoter ranges
+    prm_delta = np.zeros(len(prm_ids) + 1, dtype=np.float32)
+    np.add.at(prm_delta, prm_start, count)
+    np.add.at(prm_delta, prm_end, -count)
+    prm_inloop = np.cumsum(prm_delta[:-1])
+
+    prm_scale = np.divide(1, prm_inloop, out=np.zeros_like(prm_inloop), where=prm_inloop != 0)
+    return sparse.diags(prm_scale) @ p_inloop
+
+
+def process_chrom(chrm, pairs_on_chr, chiapet_on_chr):
     print("processing " + chrm + " . . .", flush=True)
-    pairs_on_chr = pair_info.loc[pair_info["ElementChr"] == chrm, :]
     genes_on_chr = pairs_on_chr.loc[:, ["GeneEnsemblID", "GeneSymbol", "GeneTSS"]].drop_duplicates().reset_index(drop=True).copy()
     elements_on_chr = pairs_on_chr.loc[:, ["ElementName", "ElementStart", "ElementEnd"]].drop_duplicates().reset_index(drop=True).copy()
-    chiapet_on_chr = chiapet.loc[chiapet["chr"] == chrm, :].reset_index(drop=True).copy()
-
-    print("\tsorting loops, elements and genes . . .", flush=True)
-    alloc_loops = alloc_pinloop(genes_on_chr, elements_on_chr, chiapet_on_chr.loc[chiapet_on_chr["loop_length"] < 1e6, :].reset_index(drop=True))
-    print("\tcalculating Pinloop . . .", flush=True)
-    pinloop = p_inloop_dense(genes_on_chr.index, elements_on_chr.index, alloc_loops).T
-    lookup = pd.DataFrame(data=pinloop, index=elements_on_chr["ElementName"].to_numpy(), columns=genes_on_chr["GeneEnsemblID"].to_numpy())
-    print("\tassigning Pinloop to CRE-gene pairs . . .\n", flush=True)
-    pair_info.loc[pairs_on_chr.index, "Pinloop"] = [lookup.loc[r, c] for r, c in zip(pairs_on_chr["ElementName"].to_numpy(), pairs_on_chr["GeneEnsemblID"].to_numpy())]
-
-print("writing to file " + sys.argv[1].split(".")[0] + "_pinloop.tsv.gz . . .")
-pair_info.to_csv(sys.argv[1].split(".")[0] + "_pinloop.tsv.gz", sep="\t", index=False)
\ No newline at end of file
+
+    print("\tsorting loops, elements and genes (" + chrm + ") . . .", flush=True)
+    loops_on_chr = chiapet_on_chr.loc[chiapet_on_chr["loop_length"] < 1e6, :].reset_index(drop=True)
+    loop_bounds = alloc_pinloop(genes_on_chr, elements_on_chr, loops_on_chr)
+    atac_start, atac_end, rnaseq_start, rnaseq_end = loop_bounds
+    n_cells = np.clip(rnaseq_end - rnaseq_start, 0, None) @ np.clip(atac_end - atac_start, 0, None)
+    p_inloop = p_inloop_sparse if n_cells < SPARSE_FRACTION * len(genes_on_chr.index) * len(elements_on_chr.index) else p_inloop_dense
+    print("\tcalculating Pinloop (" + chrm + ") . . .", flush=True)
+    pinloop = p_inloop(genes_on_chr.index, elements_on_chr.index, *loop_bounds, loops_on_chr["count"].to_numpy(dtype=np.float64))
+    element_ix = pd.Index(elements_on_chr["ElementName"].to_numpy()).get_indexer(pairs_on_chr["ElementName"].to_numpy())
+    gene_ix = pd.Index(genes_on_chr["GeneEnsemblID"].to_numpy()).get_indexer(pairs_on_chr["GeneEnsemblID"].to_numpy())
+    return pd.Series(np.asarray(pinloop[gene_ix, element_ix]).ravel(), index=pairs_on_chr.index)
+
+
+if __name__ == "__main__":
+    # optional second argument: number of chromosomes processed in parallel (each holds its own Pinloop matrix)
+    n_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    print("reading ChIA-PET data . . .")
+    chiapet = pd.read_table("ChIA-PET_final_filtered.tsv.gz", engine="pyarrow")
+    print("reading CRE-gene pairs . . .\n")
+    pair_info = e2g_io.load_universe(sys.argv[1])
+    # genes are placed on the loops by their TSS, so pinloop (unlike load_universe) needs every GeneTSS as an integer
+    pair_info["GeneTSS"] = pair_info["GeneTSS"].astype(np.int32)
+    pair_info["Pinloop"] = np.zeros(len(pair_info.index), dtype=np.float32)
+
+    chiapet["loop_length"] = chiapet["center2"] - chiapet["center1"]
+
+    chroms = pair_info["ElementChr"].unique()
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        pinloop_by_chr = executor.map(
+            process_chrom,
+            chroms,
+            (pair_info.loc[pair_info["ElementChr"] == chrm, :] for chrm in chroms),
+            (chiapet.loc[chiapet["chr"] == chrm, :].reset_index(drop=True) for chrm in chroms)
+        )
+        print("assigning Pinloop to CRE-gene pairs . . .\n", flush=True)
+        for pinloop_on_chr in pinloop_by_chr:
+            pair_info.loc[pinloop_on_chr.index, "Pinloop"] = pinloop_on_chr.to_numpy()
+
+    output_path = e2g_io.derived_path(sys.argv[1], "_pinloop")
+    print("writing to file " + output_path + " . . .")
+    e2g_io.save_universe(pair_info, output_path)
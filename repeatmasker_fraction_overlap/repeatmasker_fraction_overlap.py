@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 import argparse
-import subprocess
+import bioframe as bf
 import pandas as pd
 import os
-import tempfile
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import e2g_io
 
+RMSK_URL = "https://hgdownload.soe.ucsc.edu/goldenPath/hg38/database/rmsk.txt.gz"
 
-def ensure_repeatmasker_bed(rmsk_bed_path: str, rmsk_txt_gz: str = "rmsk.hg38.txt.gz"):
+# Columns of the UCSC rmsk table
+RMSK_COLUMNS = [
+    "bin", "swScore", "milliDiv", "milliDel", "milliIns", "genoName", "genoStart", "genoEnd",
+    "genoLeft", "strand", "repName", "repClass", "repFamily", "repStart", "repEnd", "repLeft", "id",
+]
+
+
+def ensure_repeatmasker_bed(rmsk_bed_path: str):
     """Check if RepeatMasker BED exists; if not, download and generate it."""
     if os.path.exists(rmsk_bed_path):
         print(f"RepeatMasker BED file found at {rmsk_bed_path}")
@@ -14,32 +24,41 @@ def ensure_repeatmasker_bed(rmsk_bed_path: str, rmsk_txt_gz: str = "rmsk.hg38.tx
 
     print("RepeatMasker BED not found. Downloading and preparing annotation...")
 
-    rmsk_bed_tmp = rmsk_bed_path
-
-    # Download RepeatMasker table
-    subprocess.run(
-        [
-            "wget",
-            "-O",
-            rmsk_txt_gz,
-            "https://hgdownload.soe.ucsc.edu/goldenPath/hg38/database/rmsk.txt.gz",
-        ],
-        check=True,
+    # Stream the RepeatMasker table straight from UCSC, keeping the BED6 columns
+    rmsk_df = pd.read_csv(
+        RMSK_URL,
+        sep="\t",
+        header=None,
+        names=RMSK_COLUMNS,
+        usecols=["genoName", "genoStart", "genoEnd", "repName", "swScore", "strand"],
+        compression="gzip",
     )
+    rmsk_df = rmsk_df[["genoName", "genoStart", "genoEnd", "repName", "swScore", "strand"]]
+    rmsk_df.columns = ["chrom", "start", "end", "name", "score", "strand"]
 
-    # Convert to BED format using awk
-    awk_cmd = (
-        f"zcat {rmsk_txt_gz} | "
-        "awk 'BEGIN{OFS=\"\\t\"} {print $6, $7, $8, $11, $2, $10}' "
-        f"> {rmsk_bed_tmp}"
-    )
-    subprocess.run(awk_cmd, shell=True, check=True)
-
-    # Remove compressed text file after conversion
-    os.remove(rmsk_txt_gz)
+    # Write the BED, then its parquet cache so the first run does not re-parse it
+    rmsk_df.to_csv(rmsk_bed_path, sep="\t", header=False, index=False)
+    rmsk_df.to_parquet(rmsk_bed_path + ".parquet", index=False)
     print(f"RepeatMasker BED created at {rmsk_bed_path}")
 
 
+def load_repeatmasker_bed(rmsk_bed_path: str) -> pd.DataFrame:
+    """Read the RepeatMasker BED, caching it as parquet next to the BED so later runs skip the text parse."""
+    rmsk_parquet_path = rmsk_bed_path + ".parquet"
+    if os.path.exists(rmsk_parquet_path) and os.path.getmtime(rmsk_parquet_path) >= os.path.getmtime(rmsk_bed_path):
+        return pd.read_parquet(rmsk_parquet_path, columns=["chrom", "start", "end"])
+
+    rmsk_df = pd.read_csv(
+        rmsk_bed_path,
+        sep="\t",
+        header=None,
+        names=["chrom", "start", "end", "name", "score", "strand"],
+        engine="pyarrow",
+    )
+    rmsk_df.to_parquet(rmsk_parquet_path, index=False)
+    return rmsk_df[["chrom", "start", "end"]]
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Compute repeat-overlap feature for E–G pairs using RepeatMasker annotations (hg38)."
@@ -47,7 +66,7 @@ def main():
     parser.add_argument(
         "--e2g",
         required=True,
-        help="Path to E–G pairs TSV/TSV.GZ file (must contain ElementChr, ElementStart, ElementEnd, ElementName)",
+        help="Path to E–G pairs TSV/TSV.GZ file or parquet dataset (must contain ElementChr, ElementStart, ElementEnd, ElementName)",
     )
     parser.add_argument(
         "--rmsk",
@@ -58,7 +77,7 @@ def main():
     parser.add_argument(
         "--output",
         required=True,
-        help="Output file path for table with repeat overlap feature (TSV or TSV.GZ)",
+        help="Output file path for table with repeat overlap feature (TSV, TSV.GZ or .parquet)",
     )
     args = parser.parse_args()
 
@@ -67,70 +86,41 @@ def main():
     output_file = args.output
 
     # Step 1. Ensure RepeatMasker BED is available
-    rmsk_txt_gz = "rmsk.hg38.txt.gz"
-    ensure_repeatmasker_bed(rmsk_file, rmsk_txt_gz)
+    ensure_repeatmasker_bed(rmsk_file)
 
-    # Step 2. Prepare temporary BED file for unique elements
+    # Step 2. Load unique element coordinates and RepeatMasker intervals
     print("Extracting and deduplicating genomic coordinates from E–G file...")
-    tmp_bed = tempfile.NamedTemporaryFile(delete=False, suffix=".bed")
-    tmp_bed_name = tmp_bed.name
-    tmp_bed.close()
-
-    e2g_df = pd.read_csv(e2g_file, sep="\t", compression="infer")
-    bed_df = e2g_df[
-        ["ElementChr", "ElementStart", "ElementEnd", "ElementName"]
-    ].drop_duplicates(subset=["ElementChr", "ElementStart", "ElementEnd"])
-    bed_df.to_csv(tmp_bed_name, sep="\t", header=False, index=False)
-
-    # Step 3. Run bedtools coverage
-    print("Running bedtools coverage...")
-    tmp_cov = tempfile.NamedTemporaryFile(delete=False, suffix=".bed")
-    tmp_cov_name = tmp_cov.name
-    tmp_cov.close()
-
-    bedtools_cmd = ["bedtools", "coverage", "-a", tmp_bed_name, "-b", rmsk_file]
-    with open(tmp_cov_name, "w") as out_cov:
-        subprocess.run(bedtools_cmd, stdout=out_cov, check=True)
-
-    # Step 4. Load and process repeat overlap results
-    print("Reading bedtools output and merging with E–G pairs...")
-    cols = [
-        "chr",
-        "start",
-        "end",
-        "name",
-        "length",
-        "bases_covered",
-        "fraction_covered",
-    ]
-    repeat_cov = pd.read_csv(tmp_cov_name, sep="\t", names=cols)
-
-    repeat_cov["repeat_overlap_fraction"] = repeat_cov["fraction_covered"].fillna(0)
-    repeat_cov["repeat_overlap_bp"] = repeat_cov["bases_covered"].fillna(0)
-    repeat_cov["ElementName"] = (
-        repeat_cov["chr"].astype(str)
-        + ":"
-        + repeat_cov["start"].astype(str)
-        + "-"
-        + repeat_cov["end"].astype(str)
+    coord_cols = {"ElementChr": "chrom", "ElementStart": "start", "ElementEnd": "end"}
+    e2g_df = e2g_io.load_universe(e2g_file)
+    elements_df = (
+        e2g_df[list(coord_cols)].drop_duplicates().rename(columns=coord_cols)
     )
+    rmsk_df = load_repeatmasker_bed(rmsk_file)
+
+    # Step 3. Compute base pairs covered by (merged) repeats for each element
+    print("Computing repeat coverage...")
+    repeat_cov = bf.coverage(elements_df, rmsk_df)
+
+    # Step 4. Compute overlap fraction (0 for zero-length elements)
+    repeat_cov["repeat_overlap_fraction"] = (
+        repeat_cov["coverage"] / (repeat_cov["end"] - repeat_cov["start"])
+    ).fillna(0)
+    repeat_cov = repeat_cov.rename(columns={v: k for k, v in coord_cols.items()})
 
     # Step 5. Merge with original E–G table
+    print("Merging with E–G pairs...")
     features = e2g_df.merge(
-        repeat_cov[["ElementName", "repeat_overlap_fraction"]],
-        on="ElementName",
+        repeat_cov[[*coord_cols, "repeat_overlap_fraction"]],
+        on=list(coord_cols),
         how="left",
     )
-    features["repeat_overlap_fraction"].fillna(0, inplace=True)
+    features["repeat_overlap_fraction"] = features["repeat_overlap_fraction"].fillna(0)
 
     # Step 6. Write final output
     print(f"Writing output to {output_file}")
-    features.to_csv(output_file, sep="\t", index=False, compression="infer")
+    e2g_io.save_universe(features, output_file)
 
-    # Step 7. Cleanup
-    os.remove(tmp_bed_name)
-    os.remove(tmp_cov_name)
-    print("Done. Temporary files removed.")
+    print("Done.")
 
 
 if __name__ == "__main__":
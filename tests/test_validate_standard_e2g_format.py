@@ -0,0 +1,49 @@
+"""
+Regression cases for validate_standard_e2g_format.py: comment and blank lines in the data section
+are skipped, and rows after them are reported at their line numbers in the file; duplicated header
+names are reported as column errors.
+"""
+
+import gzip
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import validate_standard_e2g_format as validator
+
+HEADER = "ElementChr\tElementStart\tElementEnd\tElementName\tElementClass\tGeneSymbol\tGeneEnsemblID\tGeneTSS\tSampleSummaryShort\tScore"
+ROW = "chr1\t10\t20\te1\tpromoter\tA\tENSG00000139618\t15\tK562\t0.5"
+BAD_ROW = ROW.replace("chr1", "chr99")
+
+
+def _validate(tmp_path, data_lines, header=HEADER):
+    path = tmp_path / "predictions.tsv.gz"
+    with gzip.open(path, "wt") as handle:
+        handle.write("\n".join(["# Source: x", header] + data_lines) + "\n")
+    return validator.validate_prediction_file(path)
+
+
+def test_commented_out_data_row_is_skipped(tmp_path):
+    is_valid, report = _validate(tmp_path, [ROW, "#" + ROW, ROW, BAD_ROW])
+    assert not is_valid
+    assert "'#chr1'" not in report
+    assert "Invalid Format [L6]: 'ElementChr' value 'chr99'" in report
+
+
+def test_blank_data_lines_are_skipped(tmp_path):
+    is_valid, report = _validate(tmp_path, [ROW, "   ", "\t", ROW, BAD_ROW])
+    assert not is_valid
+    assert "Fatal Parsing Error" not in report
+    assert "Invalid Format [L7]: 'ElementChr' value 'chr99'" in report
+
+
+def test_comment_and_blank_lines_alone_are_valid(tmp_path):
+    is_valid, report = _validate(tmp_path, [ROW, "#" + ROW, "", "\t", ROW])
+    assert is_valid, report
+
+
+def test_duplicate_header_column_is_reported(tmp_path):
+    is_valid, report = _validate(tmp_path, [ROW + "\t0.1"], header=HEADER + "\tScore")
+    assert not is_valid
+    assert "Duplicate Column: The column 'Score' appears more than once in the header." in report
+    assert "unexpected error" not in report
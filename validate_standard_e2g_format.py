@@ -3,44 +3,117 @@ import re
 from pathlib import Path
 import pandas as pd
 import sys
-import gzip
 import argparse
-from typing import List, Dict, Set, Tuple
+from typing import BinaryIO, FrozenSet, Iterator, List, Dict, Set, Tuple
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 import os
 import difflib
+import functools
+import bisect
+import collections
+
+try:
+    # C++ implementations of difflib-style similarity ratios
+    from rapidfuzz import fuzz, process
+except ImportError:
+    process = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    # ISA-L's SIMD inflate is a drop-in for the gzip module and 2-4x faster
+    from isal import igzip as gzip_backend
+except ImportError:
+    import gzip as gzip_backend
 
 
 # Data Validation
+# Arrow types the columns are parsed into; every Arrow type is nullable, so blanks are caught manually,
+# and string checks run as pyarrow.compute kernels without conversion
 DTYPES = {
-    'ElementChr': 'string',
-    'ElementStart': 'Int64',  # Use nullable integer to catch NaNs manually
-    'ElementEnd': 'Int64',    # Use nullable integer to catch NaNs manually
-    'ElementName': 'string',
-    'ElementClass': 'string',
-    'GeneSymbol': 'string',
-    'GeneEnsemblID': 'string',
-    'GeneTSS': 'Int64',
-    'SampleSummaryShort': 'string',
-    'Score': 'float'          # Float is inherently nullable (uses np.nan)
+    'ElementChr': pa.string(),
+    'ElementStart': pa.int64(),
+    'ElementEnd': pa.int64(),
+    'ElementName': pa.string(),
+    'ElementClass': pa.string(),
+    'GeneSymbol': pa.string(),
+    'GeneEnsemblID': pa.string(),
+    'GeneTSS': pa.int64(),
+    'SampleSummaryShort': pa.string(),
+    'Score': pa.float64()
 }
+# Cells read as missing values: the tokens pandas.read_csv treats as NA by default (pyarrow's own list lacks 'None' and '<NA>')
+NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
 REQUIRED_COLS = list(DTYPES.keys())
+REQUIRED_COLS_SET = frozenset(REQUIRED_COLS)
+
+# Matches the newline before a '#' comment line or a blank (whitespace-only) line in the data section,
+# which are skipped; the line itself is group 1. Anchoring on the newline keeps the scan fast
+SKIPPED_LINE_REGEX = re.compile(rb"\n(?=([ \t\r\f\v]*(?:#[^\n]*)?\n))")
 
 # Matches chr + (1-22 or X/Y/M)
 CHR_REGEX = re.compile(r"^chr((?:[1-9]|1\d|2[0-2])|[XYM])$")
+# The complete set of names CHR_REGEX accepts, for hashed lookups instead of per-row regex matching
+VALID_CHRS = frozenset(f"chr{c}" for c in [*map(str, range(1, 23)), 'X', 'Y', 'M'])
 
 # Matches a valid Ensembl ID format, e.g., 'ENSG00000139618' or 'ENST00000384233.3'
 ENSEMBL_ID_REGEX = re.compile(r"^ENS[A-Z]{1,5}\d{11}(?:\.\d+)?$")
+# The same pattern as options for Arrow's RE2 match kernel, built once and shared by every chunk
+ENSEMBL_ID_MATCH = pc.MatchSubstringOptions(ENSEMBL_ID_REGEX.pattern)
 
 # Allowed values for ElementClass (case-sensitive)
 ALLOWED_ELEMENT_CLASSES = {'promoter', 'genic', 'intergenic'}
+# The same values as options for Arrow's set lookup kernel
+ELEMENT_CLASS_LOOKUP = pc.SetLookupOptions(pa.array(sorted(ALLOWED_ELEMENT_CLASSES)))
+
+# Bit flags for the data problems already reported, since each is only reported once per file
+FLAG_CHR = 1 << 0
+FLAG_START_NAN = 1 << 1
+FLAG_START_VALUE = 1 << 2
+FLAG_END_NAN = 1 << 3
+FLAG_END_VALUE = 1 << 4
+FLAG_TSS_NEGATIVE = 1 << 5
+FLAG_TSS_BLANK = 1 << 6
+FLAG_SCORE = 1 << 7
+FLAG_ELEMENT_NAME = 1 << 8
+FLAG_GENE_SYMBOL = 1 << 9
+FLAG_SAMPLE_SUMMARY = 1 << 10
+FLAG_ELEMENT_CLASS = 1 << 11
+FLAG_ENSEMBL_ID = 1 << 12
+ALL_FLAGS = (1 << 13) - 1
+
+# (missing value, invalid value) flags of the coordinate columns, and blank flags of the string columns
+COORDINATE_FLAGS = {'ElementStart': (FLAG_START_NAN, FLAG_START_VALUE), 'ElementEnd': (FLAG_END_NAN, FLAG_END_VALUE)}
+STRING_FLAGS = {'ElementName': FLAG_ELEMENT_NAME, 'GeneSymbol': FLAG_GENE_SYMBOL, 'SampleSummaryShort': FLAG_SAMPLE_SUMMARY}
+# Every flag a column can raise, so a missing column counts as fully reported
+COLUMN_FLAGS = {
+    'ElementChr': FLAG_CHR,
+    'ElementStart': FLAG_START_NAN | FLAG_START_VALUE,
+    'ElementEnd': FLAG_END_NAN | FLAG_END_VALUE,
+    'ElementName': FLAG_ELEMENT_NAME,
+    'ElementClass': FLAG_ELEMENT_CLASS,
+    'GeneSymbol': FLAG_GENE_SYMBOL,
+    'GeneEnsemblID': FLAG_ENSEMBL_ID,
+    'GeneTSS': FLAG_TSS_NEGATIVE | FLAG_TSS_BLANK,
+    'SampleSummaryShort': FLAG_SAMPLE_SUMMARY,
+    'Score': FLAG_SCORE
+}
 
 # Metadata Check
-REQUIRED_META_KEYS = {
+REQUIRED_META_KEYS = frozenset({
     "Source", "Version", "GenomeReference", "URL", "Assays",
     "SampleAgnostic", "SampleTermName", "SampleTermID", "SampleSummaryShort", "ScoreType"
-}
-OPTIONAL_META_KEYS = {"ScoreThreshold", "Metadata"}
+})
+OPTIONAL_META_KEYS = frozenset({"ScoreThreshold", "Metadata"})
 
 # Pre-compiled regexes for performance and clarity.
 # META_LINE_REGEX = re.compile(r"^#\s*([^:]+):\s*(.*)$")
@@ -62,152 +135,390 @@ META_DESCRIPTIONS: Dict[str, str] = {
     "Metadata": "IGVF data portal accession ID for full metadata",
 }
 
-def _validate_chr_column(chunk: pd.DataFrame, start_row: int, reported: Set[str]) -> Tuple[List[str], List[str]]:
+def _first_true(mask: np.ndarray) -> int:
+    """Returns the position of the first True in a boolean array, or -1 if there is none."""
+    idx = int(mask.argmax()) if mask.size else 0
+    return idx if mask.size and mask[idx] else -1
+
+def _validate_chr_column(chunk: pd.DataFrame, reported: int) -> Tuple[List[str], List[str], int]:
     """Validates the 'ElementChr' column format."""
-    if 'ElementChr' in reported:
-        return [], []
-    
-    bad_rows = chunk[~chunk['ElementChr'].str.match(CHR_REGEX, na=False)]
-    if not bad_rows.empty:
-        row = bad_rows.iloc[0]
-        line = start_row + row.name
-        error = (f"Invalid Format [L{line}]: 'ElementChr' value '{row['ElementChr']}' "
-                 "is not in Gencode/UCSC notation.  Possible values: [chr1, chr2, ..., chr22, chrX chrY, chrM]")
-        reported.add('ElementChr')
-        return [error], []
-    return [], []
+    if 'ElementChr' not in chunk.columns or reported & FLAG_CHR:
+        return [], [], reported
 
-def _validate_coordinate_columns(chunk: pd.DataFrame, start_row: int, reported: Set[str]) -> Tuple[List[str], List[str]]:
-    """Validates 'ElementStart' and 'ElementEnd' columns."""
-    errors = []
-    for col in ['ElementStart', 'ElementEnd']:
-        if col not in chunk.columns: continue
+    idx = _first_true(~chunk['ElementChr'].isin(VALID_CHRS).to_numpy())
+    if idx >= 0:
+        line = chunk.index[idx]
+        error = (f"Invalid Format [L{line}]: 'ElementChr' value '{chunk['ElementChr'].iat[idx]}' "
+                 "is not in Gencode/UCSC notation.  Possible values: [chr1, chr2, ..., chr22, chrX chrY, chrM]")
+        return [error], [], reported | FLAG_CHR
+    return [], [], reported
+
+if njit is not None:
+    @njit(cache=True)
+    def _first_missing_and_negative(values: np.ndarray, missing: np.ndarray) -> Tuple[int, int]:
+        """Returns the positions of the first missing and the first negative value (-1 if none) in one pass."""
+        missing_idx = neg_idx = -1
+        for i in range(values.size):
+            if missing[i] or values[i] != values[i]: # Null, or NaN in a float column
+                if missing_idx < 0:
+                    missing_idx = i
+            elif neg_idx < 0 and values[i] < 0:
+                neg_idx = i
+            if missing_idx >= 0 and neg_idx >= 0:
+                break
+        return missing_idx, neg_idx
+else:
+    def _first_missing_and_negative(values: np.ndarray, missing: np.ndarray) -> Tuple[int, int]:
+        """Returns the positions of the first missing and the first negative value (-1 if none)."""
+        missing = missing | (values != values) # Null, or NaN in a float column
+        return _first_true(missing), _first_true((values < 0) & ~missing)
+
+def _validate_numeric_columns(chunk: pd.DataFrame, reported: int) -> Tuple[List[str], List[str], int]:
+    """Validates 'ElementStart', 'ElementEnd', 'GeneTSS' and 'Score', scanning each column once."""
+    errors, warnings = [], []
+
+    def first_nan_and_negative(col):
+        # Scan the values in their own dtype (int64 coordinates stay integers) next to the null mask
+        values = chunk[col]
+        return _first_missing_and_negative(values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0), values.isna().to_numpy())
+
+    for col, (nan_flag, value_flag) in COORDINATE_FLAGS.items():
+        if col not in chunk.columns or reported & (nan_flag | value_flag) == nan_flag | value_flag: continue
+        nan_idx, neg_idx = first_nan_and_negative(col)
 
         # Check for missing values
-        if f'{col}_nan' not in reported and chunk[col].isnull().any():
-            row = chunk[chunk[col].isnull()].iloc[0]
-            line = start_row + row.name
+        if not reported & nan_flag and nan_idx >= 0:
+            line = chunk.index[nan_idx]
             errors.append(f"Missing Value [L{line}]: '{col}' coordinate is required and cannot be blank.")
-            reported.add(f'{col}_nan')
+            reported |= nan_flag
 
         # Check for non-positive values
-        if f'{col}_value' not in reported and (chunk[col].dropna() < 0).any():
-            row = chunk[(chunk[col].notna()) & (chunk[col] < 0)].iloc[0]
-            line = start_row + row.name
+        if not reported & value_flag and neg_idx >= 0:
+            line = chunk.index[neg_idx]
             errors.append(
-                f"Invalid Value [L{line}]: '{col}' coordinate must be a nonnegative integer, but found '{int(row[col])}'."
+                f"Invalid Value [L{line}]: '{col}' coordinate must be a nonnegative integer, but found '{int(chunk[col].iat[neg_idx])}'."
             )
-            reported.add(f'{col}_value')
-    return errors, []
-
-def _validate_non_empty_strings(chunk: pd.DataFrame, start_row: int, reported: Set[str]) -> Tuple[List[str], List[str]]:
+            reported |= value_flag
+
+    # 'GeneTSS' must be a non-negative integer; blanks are only a warning, and only until a negative TSS is reported
+    if 'GeneTSS' in chunk.columns and not reported & FLAG_TSS_NEGATIVE:
+        nan_idx, neg_idx = first_nan_and_negative('GeneTSS')
+        if neg_idx >= 0:
+            line_num = chunk.index[neg_idx]
+            errors.append(f"Invalid Value [L{line_num}]: 'GeneTSS' must be a nonnegative coordinate, not {int(chunk['GeneTSS'].iat[neg_idx])}.")
+            reported |= FLAG_TSS_NEGATIVE | FLAG_TSS_BLANK # No blank warnings after a negative TSS
+        elif nan_idx >= 0 and not reported & FLAG_TSS_BLANK:
+            line_num = chunk.index[nan_idx]
+            warnings.append(f"Data Warning [L{line_num}]: 'GeneTSS' should not contain blank/NaN values.")
+            reported |= FLAG_TSS_BLANK
+
+    # 'Score' may be negative but cannot be blank
+    if 'Score' in chunk.columns and not reported & FLAG_SCORE:
+        nan_idx, _ = first_nan_and_negative('Score')
+        if nan_idx >= 0:
+            line_num = chunk.index[nan_idx]
+            errors.append(f"Invalid Value [L{line_num}]: 'Score' column cannot contain blank or NaN values.")
+            reported |= FLAG_SCORE
+
+    return errors, warnings, reported
+
+def _validate_non_empty_strings(chunk: pd.DataFrame, reported: int) -> Tuple[List[str], List[str], int]:
     """Validates that certain string columns are not empty."""
     errors = []
-    for col in ['ElementName', 'GeneSymbol', 'SampleSummaryShort']:
-        if col not in chunk.columns or col in reported: continue
+    for col, flag in STRING_FLAGS.items():
+        if col not in chunk.columns or reported & flag: continue
         
-        invalid = chunk[chunk[col].isnull() | (chunk[col].str.strip().str.len() == 0)]
-        if not invalid.empty:
-            row = invalid.iloc[0]
-            line = start_row + row.name
+        values = pa.array(chunk[col].array)
+        blank = pc.or_kleene(pc.is_null(values), pc.equal(pc.utf8_length(pc.utf8_trim_whitespace(values)), 0))
+        idx = pc.index(blank, True).as_py()
+        if idx >= 0:
+            line = chunk.index[idx]
             errors.append(f"Invalid Value [L{line}]: Column '{col}' cannot be blank or empty.")
-            reported.add(col)
-    return errors, []
+            reported |= flag
+    return errors, [], reported
 
-def _validate_element_class(chunk: pd.DataFrame, start_row: int, reported: Set[str]) -> Tuple[List[str], List[str]]:
+def _validate_element_class(chunk: pd.DataFrame, reported: int) -> Tuple[List[str], List[str], int]:
     """Validates 'ElementClass' against a list of allowed values (Warning only)."""
-    if 'ElementClass' not in chunk.columns or 'ElementClass' in reported:
-        return [], []
+    if 'ElementClass' not in chunk.columns or reported & FLAG_ELEMENT_CLASS:
+        return [], [], reported
         
-    invalid = chunk[~chunk['ElementClass'].str.lower().isin(ALLOWED_ELEMENT_CLASSES) & chunk['ElementClass'].notna()]
-    if not invalid.empty:
-        row = invalid.iloc[0]
-        line = start_row + row.name
+    # Lowercase and look up only the few distinct values, then find the first row holding a rejected one
+    classes = pa.array(chunk['ElementClass'].array)
+    distinct = pc.drop_null(pc.unique(classes))
+    rejected = pc.filter(distinct, pc.invert(pc.is_in(pc.utf8_lower(distinct), options=ELEMENT_CLASS_LOOKUP)))
+    idx = pc.index(pc.is_in(classes, value_set=rejected), True).as_py()
+    if idx >= 0:
+        line = chunk.index[idx]
         warning = (f"Data Warning [L{line}]: 'ElementClass' has an unrecognized value "
-                   f"'{row['ElementClass']}'. Allowed values are {ALLOWED_ELEMENT_CLASSES}.")
-        reported.add('ElementClass')
-        return [], [warning]
-    return [], []
-
-def _validate_ensembl_id(chunk: pd.DataFrame, start_row: int, reported: Set[str]) -> Tuple[List[str], List[str]]:
+                   f"'{chunk['ElementClass'].iat[idx]}'. Allowed values are {ALLOWED_ELEMENT_CLASSES}.")
+        return [], [warning], reported | FLAG_ELEMENT_CLASS
+    return [], [], reported
+
+if njit is not None:
+    @njit(cache=True)
+    def _is_ensembl_id(data: np.ndarray, start: int, end: int) -> bool:
+        """Checks data[start:end] against ENSEMBL_ID_REGEX byte by byte."""
+        if end - start < 15 or data[start] != 69 or data[start + 1] != 78 or data[start + 2] != 83: # 'ENS'
+            return False
+        i = start + 3
+        while i < end and i - start < 8 and 65 <= data[i] <= 90: # 1-5 of 'A'-'Z'
+            i += 1
+        if i == start + 3 or i + 11 > end:
+            return False
+        for j in range(i, i + 11): # 11 digits
+            if not 48 <= data[j] <= 57:
+                return False
+        i += 11
+        if i == end:
+            return True
+        if data[i] != 46 or i + 1 == end: # Optional '.' and version digits
+            return False
+        for j in range(i + 1, end):
+            if not 48 <= data[j] <= 57:
+                return False
+        return True
+
+    @njit(cache=True)
+    def _first_invalid_ensembl_id_bytes(data: np.ndarray, offsets: np.ndarray, valid: np.ndarray) -> int:
+        """Returns the position of the first valid (non-null) string that is not an Ensembl ID, or -1."""
+        for i in range(offsets.size - 1):
+            if valid[i] and not _is_ensembl_id(data, offsets[i], offsets[i + 1]):
+                return i
+        return -1
+
+def _first_invalid_ensembl_id(ids: pa.Array) -> int:
+    """Returns the position of the first ID not matching ENSEMBL_ID_REGEX (-1 if none); blank IDs are not format errors."""
+    if njit is None:
+        # Match with Arrow's vectorized RE2 kernel
+        matches = pc.match_substring_regex(ids, options=ENSEMBL_ID_MATCH)
+        return pc.index(pc.invert(pc.fill_null(matches, True)), True).as_py()
+
+    # Check the string bytes in place through the array's offsets, without running a regex per row
+    if isinstance(ids, pa.ChunkedArray):
+        ids = ids.combine_chunks()
+    _, offsets, data = ids.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int32)[ids.offset:ids.offset + len(ids) + 1]
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+    return _first_invalid_ensembl_id_bytes(data, offsets, ids.is_valid().to_numpy(zero_copy_only=False))
+
+def _validate_ensembl_id(chunk: pd.DataFrame, reported: int) -> Tuple[List[str], List[str], int]:
     """Validates the 'GeneEnsemblID' format."""
-    if 'GeneEnsemblID' not in chunk.columns or 'GeneEnsemblID' in reported:
-        return [], []
-
-    invalid = chunk['GeneEnsemblID'].dropna()[~chunk['GeneEnsemblID'].dropna().str.match(ENSEMBL_ID_REGEX)]
-    if not invalid.empty:
-        row = invalid.to_frame().iloc[0]
-        line = start_row + row.name
-        error = (f"Invalid Format [L{line}]: 'GeneEnsemblID' value '{row['GeneEnsemblID']}' "
+    if 'GeneEnsemblID' not in chunk.columns or reported & FLAG_ENSEMBL_ID:
+        return [], [], reported
+
+    idx = _first_invalid_ensembl_id(pa.array(chunk['GeneEnsemblID'].array))
+    if idx >= 0:
+        line = chunk.index[idx]
+        error = (f"Invalid Format [L{line}]: 'GeneEnsemblID' value '{chunk['GeneEnsemblID'].iat[idx]}' "
                  "is not a valid Ensembl ID format (e.g., ENSG00000136997).")
-        reported.add('GeneEnsemblID')
-        return [error], []
-    return [], []
-
-def _validate_nonnegative_TSS(chunk: pd.DataFrame, start_row: int, reported: Set[str]) -> Tuple[List[str], List[str]]:
-    """Validates 'GeneTSS' is a non-negative integer"""
-    if 'GeneTSS' not in chunk.columns or 'GeneTSS_negative' in reported:
-        return [], []
-    
-    invalid = chunk[chunk['GeneTSS'].dropna() < 0]
-    if not invalid.empty:
-        row = invalid.iloc[0]
-        line_num = start_row + row.name
-        error = f"Invalid Value [L{line_num}]: 'GeneTSS' must be a nonnegative coordinate, not {int(row['GeneTSS'])}."
-        reported.add('GeneTSS_negative')
-        return [error], []
-    return [], []
-
-def _validate_not_blank_TSS(chunk: pd.DataFrame, start_row: int, reported: Set[str]) -> Tuple[List[str], List[str]]:
-    """Validates 'GeneTSS' conatins no blanks (Warning only)"""
-    if 'GeneTSS' not in chunk.columns or 'GeneTSS_blank_warn' in reported or 'GeneTSS_negative' in reported:
-        return [], []
-    
-    invalid = chunk[chunk['GeneTSS'].isnull()]
-    if not invalid.empty:
-        row = invalid.iloc[0]
-        line_num = start_row + row.name
-        warning = f"Data Warning [L{line_num}]: 'GeneTSS' should not contain blank/NaN values."
-        reported.add('GeneTSS_blank_warn')
-        return [], [warning]
-    return [], []
-
-def _validate_score(chunk: pd.DataFrame, start_row: int, reported: Set[str]) -> Tuple[List[str], List[str]]:
-    """Validates 'Score' is numeric and contains no NaN."""
-    if 'Score' not in chunk.columns or 'Score' in reported:
-        return [], []
-
-    invalid_rows = chunk[chunk['Score'].isnull()]
-    if not invalid_rows.empty:
-        first_bad_row = invalid_rows.iloc[0]
-        line_num = start_row + first_bad_row.name
-        error = f"Invalid Value [L{line_num}]: 'Score' column cannot contain blank or NaN values."
-        reported.add('Score')
-        return [error], []
-    return [], []
-
-
-def _check_data_rows(file_path: Path, parsed_meta: Dict[str, str], check_all_rows: bool = False) -> Tuple[List[str], List[str]]:
+        return [error], [], reported | FLAG_ENSEMBL_ID
+    return [], [], reported
+
+# The validation helpers, in the order their messages are reported
+VALIDATORS = (
+    _validate_chr_column,
+    _validate_numeric_columns,
+    _validate_non_empty_strings,
+    _validate_element_class,
+    _validate_ensembl_id
+)
+
+def _read_header_block(handle: BinaryIO) -> Tuple[List[Tuple[int, str]], int, List[str]]:
+    """
+    Reads the metadata comment block and the column header from an open prediction file,
+    leaving the handle positioned at the first data row.
+
+    Args:
+        handle: The decompressed prediction file, opened in binary mode.
+
+    Returns:
+        A tuple containing:
+        - The (line number, stripped text) of every line before the header.
+        - The line number of the header (0 if the file has no header).
+        - The column names from the header.
+    """
+    preamble: List[Tuple[int, str]] = []
+    line_num = 0
+    while True:
+        # Split the complete lines already in the read buffer in one go, and consume only up to the header
+        buffered = handle.peek(1)
+        complete = buffered[:buffered.rfind(b'\n') + 1]
+        if complete:
+            lines = [line + b'\n' for line in complete.split(b'\n')[:-1]]
+        else:
+            # A line longer than the buffer, or a last line without a newline
+            lines = [handle.readline()]
+            if not lines[0]:
+                return preamble, 0, []
+
+        consumed = 0
+        for line in lines:
+            line_num += 1
+            consumed += len(line)
+            text = line.decode('utf-8')
+            stripped = text.strip()
+            if stripped and not stripped.startswith('#'):
+                if complete:
+                    handle.read(consumed)
+                return preamble, line_num, [col.strip() for col in text.split('\t')]
+            preamble.append((line_num, stripped))
+        if complete:
+            handle.read(consumed)
+
+
+class _DataLines:
+    """
+    Read-only file view of the data section that drops '#' comment lines and blank lines before
+    they reach the CSV parser, and remembers where they were so rows map back to file line numbers.
+    """
+
+    def __init__(self, handle: BinaryIO, first_line_num: int, block_size: int = 1 << 20):
+        self._handle = handle
+        self._first_line_num = first_line_num
+        self._block_size = block_size
+        self._partial = b'\n' # Newline ending the last complete line read, then the incomplete line after it
+        self._ready = b''
+        self._rows = 0 # Data rows passed on so far
+        self._dropped: List[int] = [] # For every dropped line, the number of data rows before it
+        self.closed = False
+
+    def _filter(self, text: bytes, end: int) -> bytes:
+        """Drops the comment and blank lines from text[1:end], complete lines that each follow a newline."""
+        pieces = []
+        pos = 1
+        for match in SKIPPED_LINE_REGEX.finditer(text, 0, end):
+            start, stop = match.span(1)
+            self._rows += text.count(b'\n', pos, start)
+            self._dropped.append(self._rows)
+            pieces.append(text[pos:start])
+            pos = stop
+        self._rows += text.count(b'\n', pos, end)
+        pieces.append(text[pos:end])
+        return b''.join(pieces)
+
+    def _next_block(self) -> bytes:
+        """Returns the next non-empty block of data lines, or b'' at the end of the file."""
+        while True:
+            block = self._handle.read(self._block_size)
+            if not block:
+                text, self._partial = self._partial + b'\n', b'\n' # Complete the unterminated last line
+                return self._filter(text, len(text)) if len(text) > 2 else b''
+            text = self._partial + block
+            cut = text.rfind(b'\n') + 1
+            self._partial = text[cut - 1:]
+            block = self._filter(text, cut)
+            if block:
+                return block
+
+    def has_rows(self) -> bool:
+        """Reads ahead to the first data line; False if the data section holds no rows at all."""
+        if not self._ready:
+            self._ready = self._next_block()
+        return bool(self._ready)
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._ready:
+            self._ready = self._next_block()
+        if size < 0 or size >= len(self._ready):
+            block, self._ready = self._ready, b''
+        else:
+            block, self._ready = self._ready[:size], self._ready[size:]
+        return block
+
+    def line_numbers(self, first_row: int, num_rows: int) -> pd.Index:
+        """File line numbers of data rows [first_row, first_row + num_rows)."""
+        line = self._first_line_num + first_row
+        last_row = first_row + num_rows - 1
+        dropped = self._dropped[:bisect.bisect_right(self._dropped, last_row)]
+        if not dropped:
+            return pd.RangeIndex(line, line + num_rows) # No dropped lines before these rows
+        rows = np.arange(first_row, first_row + num_rows)
+        return pd.Index(self._first_line_num + rows + np.searchsorted(np.asarray(dropped), rows, side='right'))
+
+
+@functools.lru_cache(maxsize=32)
+def _reader_options(actual_columns: Tuple[str, ...], found_columns: FrozenSet[str]) -> Tuple[
+        pa.Schema, pa_csv.ReadOptions, pa_csv.ParseOptions, pa_csv.ConvertOptions]:
+    """
+    Builds the target schema and CSV reader options for a header, cached so a batch of files
+    sharing one header layout builds them only once.
+    """
+    # Integer columns are parsed as floats and cast back safely, so integral values written
+    # as '100.0' are accepted while fractional values fail the cast
+    schema = pa.schema([(col, DTYPES[col]) for col in actual_columns if col in found_columns])
+    read_options = pa_csv.ReadOptions(column_names=list(actual_columns)) # Use actual names from file
+    parse_options = pa_csv.ParseOptions(delimiter='\t')
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=schema.names, # IMPORTANT: Only load correctly named columns
+        column_types={field.name: pa.float64() if pa.types.is_integer(field.type) else field.type for field in schema},
+        null_values=NA_VALUES,
+        strings_can_be_null=True # Blank and NA-token strings are missing values, as in pandas
+    )
+    return schema, read_options, parse_options, convert_options
+
+
+def _iter_data_chunks(handle: BinaryIO, first_line_num: int, actual_columns: List[str], found_columns: Set[str],
+                      first_rows: int, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Streams the data rows with pyarrow's multithreaded CSV reader, loading only the correctly
+    named columns, and yields them as DataFrames of `first_rows` rows and then `chunk_rows` rows,
+    indexed by their line numbers in the file (`first_line_num` being the line after the header).
+    """
+    lines = _DataLines(handle, first_line_num)
+    if not lines.has_rows():
+        return # Header only, no data rows
+
+    schema, read_options, parse_options, convert_options = _reader_options(tuple(actual_columns), frozenset(found_columns))
+    reader = pa_csv.open_csv(
+        lines, # Already past the metadata AND the header we read
+        read_options=read_options,
+        parse_options=parse_options,
+        convert_options=convert_options
+    )
+
+    # Record batches are sized in bytes, so collect them into chunks of the requested row counts
+    def to_chunk(table: pa.Table) -> pd.DataFrame:
+        chunk = table.cast(schema).to_pandas(types_mapper=pd.ArrowDtype)
+        chunk.index = lines.line_numbers(rows_done, len(chunk))
+        return chunk
+
+    pending: List[pa.RecordBatch] = []
+    pending_rows = 0
+    rows_done = 0
+    target_rows = first_rows
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= target_rows:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield to_chunk(table.slice(0, target_rows))
+            rows_done += target_rows
+            rest = table.slice(target_rows)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+            target_rows = chunk_rows
+    if pending_rows:
+        yield to_chunk(pa.Table.from_batches(pending, schema=reader.schema))
+
+
+def _check_data_rows(handle: BinaryIO, header_line_num: int, actual_columns: List[str], parsed_meta: Dict[str, str],
+                     check_all_rows: bool = False, sample_rows: int = 5000) -> Tuple[List[str], List[str]]:
     """
     Orchestrates data row validation, providing specific feedback on missing columns
     and validating data only in the columns that are correctly named.
+
+    The handle must be positioned at the first data row (see _read_header_block), so the
+    rows are parsed from the same decompressed stream as the metadata and header.
+    The first `sample_rows` rows are checked on their own, so problems near the top of
+    a file are reported without parsing a full chunk; the rest follows in full chunks.
     """
     data_errors: List[str] = []
     data_warnings: List[str] = []
 
     # --- 1. Header Analysis ---
-    try:
-        with gzip.open(file_path, 'rt', encoding='utf-8') as f:
-            for i, line in enumerate(f, 1):
-                if not line.strip().startswith('#'):
-                    actual_columns = [col.strip() for col in line.split('\t')]
-                    header_line_num = i
-                    break
-    except Exception as e:
-        data_errors.append(f"Fatal Parsing Error: Could not read file header. Error: {e}")
-        return data_errors, data_warnings
-
-    expected_set = set(REQUIRED_COLS)
+    expected_set = REQUIRED_COLS_SET
     actual_set = set(actual_columns)
     
     missing_columns = expected_set - actual_set
@@ -216,81 +527,51 @@ def _check_data_rows(file_path: Path, parsed_meta: Dict[str, str], check_all_row
 
     # --- 2. Report Missing Columns ---
     if missing_columns:
-        for col in sorted(list(missing_columns)):
+        candidates = sorted(extra_columns)
+        for col in sorted(missing_columns):
             suggestion = ""
-            close_matches = difflib.get_close_matches(col, list(extra_columns), n=1, cutoff=0.7)
+            if process is not None:
+                match = process.extractOne(col, candidates, scorer=fuzz.ratio, score_cutoff=70)
+                close_matches = [match[0]] if match else []
+            else:
+                close_matches = difflib.get_close_matches(col, candidates, n=1, cutoff=0.7)
             if close_matches:
                 suggestion = f" Closest matching column found: '{close_matches[0]}'."
             data_errors.append(f"Missing Column: The required column '{col}' was not found.{suggestion}")
 
-    # If no valid columns were found, we can't proceed.
-    if not found_columns:
+    # --- 3. Report Duplicate Columns ---
+    # Rows can't be mapped onto columns that share a name, so the data isn't validated either
+    duplicate_columns = sorted(col for col, count in collections.Counter(actual_columns).items() if count > 1)
+    for col in duplicate_columns:
+        data_errors.append(f"Duplicate Column: The column '{col}' appears more than once in the header.")
+
+    # If no valid columns were found, or some can't be told apart, we can't proceed.
+    if not found_columns or duplicate_columns:
         return data_errors, data_warnings
 
-    # --- 3. Data Validation on Found Columns ---
-    reported_error_categories: Set[str] = set()
+    # --- 4. Data Validation on Found Columns ---
+    # Columns that are missing can't report anything, so their flags start out set
+    reported = 0
+    for col in missing_columns:
+        reported |= COLUMN_FLAGS[col]
     chunksize = 100000
-    
-    # Filter dtypes to only those columns we are actually loading
-    dtypes_to_use = {k: v for k, v in DTYPES.items() if k in found_columns}
 
     try:
-        chunk_iterator = pd.read_csv(
-            file_path,
-            sep='\t',
-            comment='#',
-            compression='gzip',
-            skiprows=header_line_num, # Skip metadata AND the header we already read
-            header=None, # We've already processed the header
-            names=actual_columns, # Use actual names from file
-            usecols=list(found_columns), # IMPORTANT: Only load correctly named columns
-            dtype=dtypes_to_use,
-            chunksize=chunksize,
-            low_memory=False
-        )
-
-        for i, chunk in enumerate(chunk_iterator):
-            chunk_start_row = header_line_num + (i * chunksize) + 1
+        for chunk in _iter_data_chunks(handle, header_line_num + 1, actual_columns, found_columns, sample_rows, chunksize):
 
             # Call each validation helper
-            errors, warnings = _validate_chr_column(chunk, chunk_start_row, reported_error_categories)
-            data_errors.extend(errors)
-            data_warnings.extend(warnings)
-
-            errors, _ = _validate_coordinate_columns(chunk, chunk_start_row, reported_error_categories)
-            data_errors.extend(errors)
-            # This helper doesn't produce warnings
+            for validate in VALIDATORS:
+                errors, warnings, reported = validate(chunk, reported)
+                data_errors += errors
+                data_warnings += warnings
 
-            errors, _ = _validate_non_empty_strings(chunk, chunk_start_row, reported_error_categories)
-            data_errors.extend(errors)
-            # This helper doesn't produce warnings
-
-            _, warnings = _validate_element_class(chunk, chunk_start_row, reported_error_categories)
-            # This helper doesn't produce errors
-            data_warnings.extend(warnings)
-            
-            errors, _ = _validate_ensembl_id(chunk, chunk_start_row, reported_error_categories)
-            data_errors.extend(errors)
-            # This helper doesn't produce warnings
-            
-            errors, _ = _validate_nonnegative_TSS(chunk, chunk_start_row, reported_error_categories)
-            data_errors.extend(errors)
-            # This helper doesn't produce warnings
-
-            _, warnings = _validate_not_blank_TSS(chunk, chunk_start_row, reported_error_categories)
-            # This helper doesn't produce errors
-            data_warnings.extend(warnings)
-
-            errors, _ = _validate_score(chunk, chunk_start_row, reported_error_categories)
-            data_errors.extend(errors)
-            # This helper doesn't produce warnings
-
-            if not check_all_rows and (data_errors or data_warnings):
+            # Even a full check can stop once every kind of problem has been reported
+            if reported == ALL_FLAGS or (not check_all_rows and (data_errors or data_warnings)):
                 break
 
-    except (ValueError, TypeError) as e:
+    except (ValueError, TypeError) as e: # pyarrow.ArrowInvalid is a ValueError
         msg = (f"Fatal Parsing Error: Data in a row could not be converted to its expected type "
-               f"(e.g., text in a number column). Please check data format. Pandas error: {e}")
+               f"(e.g., text in a number column). Please check data format. Parser error: {e}")
         data_errors.append(msg)
     except Exception as e:
         data_errors.append(f"An unexpected error occurred during data processing: {e}")
@@ -298,16 +579,17 @@ def _check_data_rows(file_path: Path, parsed_meta: Dict[str, str], check_all_row
     return data_errors, data_warnings
 
 
-def _check_metadata_header(file_path: Path) -> Tuple[List[str], Dict[str, str]]:
+def _check_metadata_header(preamble: List[Tuple[int, str]]) -> Tuple[List[str], Dict[str, str]]:
     """
-    Reads and parses metadata from a gzipped file, returning advisories.
+    Parses metadata from the top of a prediction file, returning advisories.
 
-    This function reads comment lines from the top of a file, parses them as
+    This function takes the comment lines from the top of a file, parses them as
     key-value metadata, and checks for common issues. It does not cause a
     hard failure but returns a list of advisory warnings.
 
     Args:
-        file_path: The path to the gzipped prediction file.
+        preamble: The (line number, stripped text) of the lines before the column
+            header, as returned by _read_header_block.
 
     Returns:
         A tuple containing:
@@ -318,59 +600,41 @@ def _check_metadata_header(file_path: Path) -> Tuple[List[str], Dict[str, str]]:
     found_meta: Dict[str, str] = {}
     key_locations: Dict[str, int] = {}
 
-    try:
-        with gzip.open(file_path, 'rt', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                stripped = line.strip()
-
-                if not stripped:
-                    continue  # Skip blank lines
-
-                if stripped.startswith('#'):
-                    # Strip leading '#' and try to split into key-value
-                    parts = stripped.lstrip('#').split(':', 1)
-                    if len(parts) == 2:
-                        key, value = parts
-                        key = key.strip()
-                        
-                        # Rule: If the key is not known, ignore this line as a simple comment.
-                        if key not in META_DESCRIPTIONS:
-                            continue
-
-                        value = value.strip()
-                        if key in found_meta:
-                            # Rule: Duplicate keys are a simple warning, not a critical error.
-                            first_occurrence = key_locations.get(key, 'N/A')
-                            warnings.append(
-                                f"Duplicate metadata key '{key}' on line {line_num}. "
-                                f"The first value from line {first_occurrence} will be used."
-                            )
-                            continue  # Ignore this duplicate key, keeping the first one
-                        
-                        found_meta[key] = value
-                        key_locations[key] = line_num
-                    # else: it's a comment without a ':', so we ignore it.
-                else:
-                    # We've reached the first non-comment, non-blank line. Metadata is over.
-                    break
-    except (gzip.BadGzipFile, EOFError) as e:
-        msg = f"ERROR: File '{file_path.name}' is not a valid gzip file or is empty. Cannot check metadata."
-        logging.warning(msg) # Downgraded from error to warning
-        warnings.append(msg)
-        return warnings, {}
-    except Exception as e:
-        msg = f"ERROR: Could not read metadata from '{file_path.name}': {e}"
-        logging.warning(msg) # Downgraded from error to warning
-        warnings.append(msg)
-        return warnings, {}
+    for line_num, stripped in preamble:
+        if not stripped:
+            continue  # Skip blank lines
+
+        # Strip leading '#' and try to split into key-value
+        parts = stripped.lstrip('#').split(':', 1)
+        if len(parts) == 2:
+            key, value = parts
+            key = key.strip()
+
+            # Rule: If the key is not known, ignore this line as a simple comment.
+            if key not in META_DESCRIPTIONS:
+                continue
+
+            value = value.strip()
+            if key in found_meta:
+                # Rule: Duplicate keys are a simple warning, not a critical error.
+                first_occurrence = key_locations.get(key, 'N/A')
+                warnings.append(
+                    f"Duplicate metadata key '{key}' on line {line_num}. "
+                    f"The first value from line {first_occurrence} will be used."
+                )
+                continue  # Ignore this duplicate key, keeping the first one
+
+            found_meta[key] = value
+            key_locations[key] = line_num
+        # else: it's a comment without a ':', so we ignore it.
 
     # --- Post-parsing validation logic ---
 
     is_sample_agnostic = found_meta.get("SampleAgnostic", "").lower() == 'true'
 
     # Check for missing REQUIRED keys
-    missing_keys = REQUIRED_META_KEYS - set(found_meta.keys())
-    for key in sorted(list(missing_keys)):
+    missing_keys = REQUIRED_META_KEYS.difference(found_meta)
+    for key in sorted(missing_keys):
         if key == "SampleTermName" and is_sample_agnostic:
             continue
         description = META_DESCRIPTIONS.get(key, "No description available.")
@@ -413,11 +677,27 @@ def validate_prediction_file(file_path: Path) -> Tuple[bool, str]:
     """
     feedback_parts = []
 
-    # Step 1: Check metadata header
-    metadata_warnings, parsed_meta = _check_metadata_header(file_path)
-
-    # Step 2: Check data rows
-    data_errors, data_warnings = _check_data_rows(file_path, parsed_meta)
+    # The file is decompressed once: the metadata and header are read off the top of
+    # the stream, which is then handed on to the data row parser
+    with gzip_backend.open(file_path, 'rb') as handle:
+        try:
+            preamble, header_line_num, actual_columns = _read_header_block(handle)
+        except (gzip_backend.BadGzipFile, EOFError) as e:
+            msg = f"ERROR: File '{file_path.name}' is not a valid gzip file or is empty. Cannot check metadata."
+            logging.warning(msg) # Downgraded from error to warning
+            metadata_warnings, data_warnings = [msg], []
+            data_errors = [f"Fatal Parsing Error: Could not read file header. Error: {e}"]
+        except Exception as e:
+            msg = f"ERROR: Could not read metadata from '{file_path.name}': {e}"
+            logging.warning(msg) # Downgraded from error to warning
+            metadata_warnings, data_warnings = [msg], []
+            data_errors = [f"Fatal Parsing Error: Could not read file header. Error: {e}"]
+        else:
+            # Step 1: Check metadata header
+            metadata_warnings, parsed_meta = _check_metadata_header(preamble)
+
+            # Step 2: Check data rows
+            data_errors, data_warnings = _check_data_rows(handle, header_line_num, actual_columns, parsed_meta)
 
     # Step 3: Compile feedback into the desired format
     if data_errors: